@@ -15,32 +15,38 @@ Behaviour summary (implemented as tools exposed to the LLM):
 The GameMasterAgent uses these tools and acts as the high-energy improv host.
 """
 
+import asyncio
 import json
 import logging
 import os
-import asyncio
-import uuid
 import random
+import re
+import time
+from collections import deque
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Dict, Optional, Annotated
+from datetime import datetime, timezone
+from functools import cache, lru_cache
+from pathlib import Path
+from textwrap import dedent
+from typing import Annotated, Final, NamedTuple, Optional
 
 from dotenv import load_dotenv
-from pydantic import Field
+from livekit import rtc
 from livekit.agents import (
+    NOT_GIVEN,
     Agent,
     AgentSession,
     JobContext,
     JobProcess,
     RoomInputOptions,
+    RunContext,
     WorkerOptions,
     cli,
     function_tool,
-    RunContext,
 )
-
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import assemblyai, google, murf, noise_cancellation, silero
+from pydantic import Field
 
 # -------------------------
 # Logging
@@ -56,51 +62,113 @@ load_dotenv(".env.local")
 # -------------------------
 # Improv Scenarios (seeded)
 # -------------------------
-# Each scenario is a clear short prompt: role, situation, tension/hook
-SCENARIOS = [
-    "You are a barista who has to tell a customer that their latte is actually a portal to another dimension.",
-    "You are a time-travelling tour guide explaining modern smartphones to someone from the 1800s.",
-    "You are a restaurant waiter who must calmly tell a customer that their order has escaped the kitchen.",
-    "You are a customer trying to return an obviously cursed object to a very skeptical shop owner.",
-    "You are an overenthusiastic TV infomercial host selling a product that clearly does not work as advertised.",
-    "You are an astronaut who just discovered the ship's coffee machine has developed a personality.",
-    "You are a nervous wedding officiant who keeps getting the couple's names mixed up in ridiculous ways.",
-    "You are a ghost trying to give a performance review to a living employee.",
-    "You are a medieval king reacting to a very modern delivery service showing up at court.",
-    "You are a detective interrogating a suspect who only answers in awkward metaphors."
-]
+# Each scenario is a clear short prompt: role, situation, tension/hook.
+# Content lives in scenarios.json next to this file so it can be edited
+# without touching code; it is parsed once per worker process.
+_SCENARIOS_PATH = Path(__file__).with_name("scenarios.json")
+
+
+@lru_cache(maxsize=1)
+def _scenarios() -> tuple[str, ...]:
+    with open(_SCENARIOS_PATH, encoding="utf-8") as f:
+        return tuple(json.load(f))
+
+# Keyword tables used to flavour host reactions and the closing recap.
+# Kept at module level so they are built once instead of on every turn.
+_HIGHLIGHT_KEYWORDS = {
+    "great comedic timing": ("funny", "lol", "hahaha", "haha"),
+    "good emotional depth": ("sad", "cry", "tears"),
+    "interesting use of silence": ("pause", "..."),
+}
+# Inverted index: keyword -> highlight (reversed so the first writer wins)
+_HIGHLIGHT_INDEX: dict[str, str] = {
+    kw: highlight for highlight, kws in reversed(_HIGHLIGHT_KEYWORDS.items()) for kw in kws
+}
+_FALLBACK_HIGHLIGHTS = ("nice character choices", "bold commitment", "unexpected twist")
+# Short host lines spoken while a performance is being scored, so the player
+# doesn't sit in silence waiting for the tool round-trip and the reaction
+_ACK_LINES = (
+    "Ooh, okay...",
+    "Alright, alright...",
+    "Mm, let me think about that one...",
+)
+# Disfluencies that shouldn't count as a performance
+_FILLERS = frozenset({"", "um", "uh", "hmm", "er", "ah"})
+_CHARACTER_KEYWORDS = ("i am", "i'm", "as a", "character", "role")
+_EMOTION_KEYWORDS = ("sad", "angry", "happy", "love", "cry", "tears")
+
+
+def _keyword_pattern(keywords) -> "re.Pattern[str]":
+    # Longest-first alternation so e.g. "hahaha" wins over "haha"; substring
+    # semantics are kept on purpose (no word boundaries, "..." must match).
+    return re.compile("|".join(map(re.escape, sorted(keywords, key=len, reverse=True))))
+
+
+_HIGHLIGHT_PATTERN = _keyword_pattern(_HIGHLIGHT_INDEX)
+_CHARACTER_PATTERN = _keyword_pattern(_CHARACTER_KEYWORDS)
+_EMOTION_PATTERN = _keyword_pattern(_EMOTION_KEYWORDS)
 
 # -------------------------
 # Per-session Improv State
 # -------------------------
+class RoundRecord(NamedTuple):
+    round: int
+    scenario_idx: Optional[int]  # index into _scenarios(), None if unknown
+    performance: str
+    reaction: str
+
+
+@dataclass
+class ImprovState:
+    current_round: int = 0
+    max_rounds: int = 3
+    rounds: list[RoundRecord] = field(default_factory=list)
+    phase: str = "idle"  # "intro" | "awaiting_improv" | "reacting" | "done" | "idle"
+    used_indices: set[int] = field(default_factory=set)  # O(1) "already played?" probe
+    current_scenario_idx: Optional[int] = None
+
+
 @dataclass
 class Userdata:
     player_name: Optional[str] = None
-    session_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
-    started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    improv_state: Dict = field(default_factory=lambda: {
-        "current_round": 0,
-        "max_rounds": 3,
-        "rounds": [],  # each: {"scenario": str, "performance": str, "reaction": str}
-        "phase": "idle",  # "intro" | "awaiting_improv" | "reacting" | "done" | "idle"
-        "used_indices": []
-    })
-    history: List[Dict] = field(default_factory=list)
+    session_id: str = field(default_factory=lambda: os.urandom(4).hex())
+    started_at: int = field(default_factory=time.time_ns)  # ns since epoch
+    improv_state: ImprovState = field(default_factory=ImprovState)
+    # each entry: (epoch_ns, action, round_no); only recent events matter
+    history: deque[tuple[int, str, int]] = field(default_factory=lambda: deque(maxlen=32))
+    # per-session pre-synthesized audio for fixed host lines (text -> frames)
+    tts_cache: dict[str, list[rtc.AudioFrame]] = field(default_factory=dict, repr=False)
 
 # -------------------------
 # Helpers
 # -------------------------
 
-def _pick_scenario(userdata: Userdata) -> str:
-    used = userdata.improv_state.get("used_indices", [])
-    candidates = [i for i in range(len(SCENARIOS)) if i not in used]
+def _log_event(userdata: Userdata, action: str, round_no: int = 0) -> None:
+    userdata.history.append((time.time_ns(), action, round_no))
+
+
+def _iso_utc(ns: int) -> str:
+    # timestamps are stored as raw ns and only formatted when displayed
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+
+def _pick_scenario(userdata: Userdata) -> int:
+    state = userdata.improv_state
+    scenarios = _scenarios()
+    candidates = [i for i in range(len(scenarios)) if i not in state.used_indices]
     if not candidates:
         # reset if we exhausted scenarios
-        userdata.improv_state["used_indices"] = []
-        candidates = list(range(len(SCENARIOS)))
+        state.used_indices.clear()
+        candidates = list(range(len(scenarios)))
     idx = random.choice(candidates)
-    userdata.improv_state["used_indices"].append(idx)
-    return SCENARIOS[idx]
+    state.used_indices.add(idx)
+    state.current_scenario_idx = idx
+    return idx
+
+
+@cache  # bounded by max rounds x number of scenarios
+def _round_prompt(round_no: int, scenario_idx: int) -> str:
+    return f"Round {round_no}: {_scenarios()[scenario_idx]}"
 
 
 def _host_reaction_text(performance: str) -> str:
@@ -108,16 +176,12 @@ def _host_reaction_text(performance: str) -> str:
     tones = ["supportive", "neutral", "mildly_critical"]
     tone = random.choice(tones)
     # Quick keyword detection to pick specific highlights (not exhaustive)
-    highlights = []
-    if any(w in performance.lower() for w in ("funny", "lol", "hahaha", "haha")):
-        highlights.append("great comedic timing")
-    if any(w in performance.lower() for w in ("sad", "cry", "tears")):
-        highlights.append("good emotional depth")
-    if any(w in performance.lower() for w in ("pause", "...")):
-        highlights.append("interesting use of silence")
+    perf = performance.lower()
+    # one regex scan over the text; dict.fromkeys dedupes while keeping order
+    highlights = list(dict.fromkeys(_HIGHLIGHT_INDEX[m.group()] for m in _HIGHLIGHT_PATTERN.finditer(perf)))
     if not highlights:
         # fallback picks
-        highlights.append(random.choice(["nice character choices", "bold commitment", "unexpected twist"]))
+        highlights.append(random.choice(_FALLBACK_HIGHLIGHTS))
 
     chosen = random.choice(highlights)
     if tone == "supportive":
@@ -127,6 +191,40 @@ def _host_reaction_text(performance: str) -> str:
     else:  # mildly_critical
         return f"Okay — {chosen}, but that felt a bit rushed. Try to make stronger choices next time. Don't be afraid to exaggerate."
 
+
+def _summary_text(userdata: Userdata) -> str:
+    rounds = userdata.improv_state.rounds
+    if not rounds:
+        return "No rounds were played. Thanks for stopping by Improv Battle!"
+
+    # Simple summary heuristics: count supportive vs critical words, highlight standout moments
+    summary_lines = [f"Thanks for playing, {userdata.player_name or 'Contestant'}! Here's a short recap:"]
+    # highlight each round briefly
+    for r in rounds:
+        perf_snip = r.performance.strip()
+        if len(perf_snip) > 80:
+            perf_snip = perf_snip[:77] + "..."
+        scenario = _scenarios()[r.scenario_idx] if r.scenario_idx is not None else "(unknown)"
+        summary_lines.append(f"Round {r.round}: {scenario} — You: '{perf_snip}' | Host: {r.reaction}")
+
+    # aggregate a simple profile (lowercase each performance once)
+    perfs = [r.performance.lower() for r in rounds]
+    mentions_character = sum(1 for p in perfs if _CHARACTER_PATTERN.search(p))
+    mentions_emotion = sum(1 for p in perfs if _EMOTION_PATTERN.search(p))
+
+    if mentions_character > len(rounds) / 2:
+        style = "commits to character choices"
+    elif mentions_emotion > 0:
+        style = "brings emotional color to scenes"
+    else:
+        style = "likes surprising beats and twists"
+
+    summary_lines.append(f"You seem to be a player who {style}. Keep leaning into clear choices and stronger stakes.")
+    summary_lines.append("Thanks for performing on Improv Battle — hope to see you again!")
+
+    _log_event(userdata, "summarize_show")
+    return "\n".join(summary_lines)
+
 # -------------------------
 # Agent Tools
 # -------------------------
@@ -149,45 +247,45 @@ async def start_show(
     if max_rounds > 8:
         max_rounds = 8
 
-    userdata.improv_state["max_rounds"] = int(max_rounds)
-    userdata.improv_state["current_round"] = 0
-    userdata.improv_state["rounds"] = []
-    userdata.improv_state["phase"] = "intro"
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "start_show", "name": userdata.player_name})
+    state = userdata.improv_state
+    state.max_rounds = int(max_rounds)
+    state.current_round = 0
+    state.rounds = []
+    state.phase = "intro"
+    _log_event(userdata, "start_show")
 
     intro = (
         f"Welcome to Improv Battle! I'm your host — let's get ready to play."
-        f" {userdata.player_name or 'Contestant'}, we'll run {userdata.improv_state['max_rounds']} rounds. "
+        f" {userdata.player_name or 'Contestant'}, we'll run {state.max_rounds} rounds. "
         "Rules: I'll give you a quick scene, you'll improvise in character. When you're done say 'End scene' or pause — I'll react and move on. Have fun!"
     )
     # After intro, immediately provide first scenario for flow convenience
-    scenario = _pick_scenario(userdata)
-    userdata.improv_state["current_round"] = 1
-    userdata.improv_state["phase"] = "awaiting_improv"
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "present_scenario", "round": 1, "scenario": scenario})
+    scenario_idx = _pick_scenario(userdata)
+    state.current_round = 1
+    state.phase = "awaiting_improv"
+    _log_event(userdata, "present_scenario", 1)
 
-    return intro + "\nRound 1: " + scenario + "\nStart improvising now!"
+    return "\n".join((intro, _round_prompt(1, scenario_idx), "Start improvising now!"))
 
 
 @function_tool
 async def next_scenario(ctx: RunContext[Userdata]) -> str:
     userdata = ctx.userdata
-    if userdata.improv_state.get("phase") == "done":
+    state = userdata.improv_state
+    if state.phase == "done":
         return "The show is already over. Say 'start show' to play again."
 
-    cur = userdata.improv_state.get("current_round", 0)
-    maxr = userdata.improv_state.get("max_rounds", 3)
-    if cur >= maxr:
-        userdata.improv_state["phase"] = "done"
-        return await summarize_show(ctx)
+    if state.current_round >= state.max_rounds:
+        state.phase = "done"
+        return _summary_text(userdata)
 
     # advance
-    next_round = cur + 1
-    scenario = _pick_scenario(userdata)
-    userdata.improv_state["current_round"] = next_round
-    userdata.improv_state["phase"] = "awaiting_improv"
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "present_scenario", "round": next_round, "scenario": scenario})
-    return f"Round {next_round}: {scenario}\nGo!"
+    next_round = state.current_round + 1
+    scenario_idx = _pick_scenario(userdata)
+    state.current_round = next_round
+    state.phase = "awaiting_improv"
+    _log_event(userdata, "present_scenario", next_round)
+    return f"{_round_prompt(next_round, scenario_idx)}\nGo!"
 
 
 @function_tool
@@ -196,71 +294,52 @@ async def record_performance(
     performance: Annotated[str, Field(description="Player's improv performance (transcribed text)")],
 ) -> str:
     userdata = ctx.userdata
-    if userdata.improv_state.get("phase") != "awaiting_improv":
-        # still accept performance but warn
-        userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "record_performance_out_of_phase"})
+    state = userdata.improv_state
+
+    # don't burn a round (or a reaction) on silence or a lone "um"
+    if performance.strip().strip(".,!?").lower() in _FILLERS:
+        if state.phase == "awaiting_improv" and state.current_scenario_idx is not None:
+            return f"Take your time! Your scene: {_scenarios()[state.current_scenario_idx]}\nStart whenever you're ready."
+        if state.phase == "done":
+            return "The show is already over. Say 'start show' to play again."
+        if state.phase == "reacting":
+            return "When you're ready, say 'Next' or I'll give you the next scene."
+        return "Take your time! Say 'start show' whenever you're ready."
+
+    # fill the gap before the reaction; not awaited so the tool returns right away
+    ack = random.choice(_ACK_LINES)
+    frames = userdata.tts_cache.get(ack)
+    ctx.session.say(
+        ack,
+        audio=_replay_frames(frames) if frames else NOT_GIVEN,
+        allow_interruptions=True,
+        add_to_chat_ctx=False,
+    )
 
-    round_no = userdata.improv_state.get("current_round", 0)
-    scenario = userdata.history[-1].get("scenario") if userdata.history and userdata.history[-1].get("action") == "present_scenario" else "(unknown)"
+    if state.phase != "awaiting_improv":
+        # still accept performance but warn
+        _log_event(userdata, "record_performance_out_of_phase", state.current_round)
 
+    round_no = state.current_round
     reaction = _host_reaction_text(performance)
 
-    userdata.improv_state["rounds"].append({
-        "round": round_no,
-        "scenario": scenario,
-        "performance": performance,
-        "reaction": reaction,
-    })
-    userdata.improv_state["phase"] = "reacting"
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "record_performance", "round": round_no})
+    state.rounds.append(RoundRecord(round_no, state.current_scenario_idx, performance, reaction))
+    state.phase = "reacting"
+    _log_event(userdata, "record_performance", round_no)
 
     # If we've reached max rounds, change to done after reaction
-    if round_no >= userdata.improv_state.get("max_rounds", 3):
-        userdata.improv_state["phase"] = "done"
-        closing = "\n" + reaction + "\nThat's the final round. "
-        closing += (await summarize_show(ctx))
-        return closing
+    if round_no >= state.max_rounds:
+        state.phase = "done"
+        summary = _summary_text(userdata)
+        return f"\n{reaction}\nThat's the final round. {summary}"
 
     # otherwise prompt for next round
-    closing = reaction + "\nWhen you're ready, say 'Next' or I'll give you the next scene."
-    return closing
+    return f"{reaction}\nWhen you're ready, say 'Next' or I'll give you the next scene."
 
 
 @function_tool
 async def summarize_show(ctx: RunContext[Userdata]) -> str:
-    userdata = ctx.userdata
-    rounds = userdata.improv_state.get("rounds", [])
-    if not rounds:
-        return "No rounds were played. Thanks for stopping by Improv Battle!"
-
-    # Simple summary heuristics: count supportive vs critical words, highlight standout moments
-    summary_lines = [f"Thanks for playing, {userdata.player_name or 'Contestant'}! Here's a short recap:"]
-    # highlight each round briefly
-    for r in rounds:
-        perf_snip = (r.get("performance") or "").strip()
-        if len(perf_snip) > 80:
-            perf_snip = perf_snip[:77] + "..."
-        summary_lines.append(f"Round {r.get('round')}: {r.get('scenario')} — You: '{perf_snip}' | Host: {r.get('reaction')}")
-
-    # aggregate a simple profile
-    mentions_character = sum(1 for r in rounds if any(w in (r.get('performance') or '').lower() for w in ('i am', "i'm", 'as a', 'character', 'role')))
-    mentions_emotion = sum(1 for r in rounds if any(w in (r.get('performance') or '').lower() for w in ('sad', 'angry', 'happy', 'love', 'cry', 'tears')))
-
-    profile = "You seem to be a player who "
-    if mentions_character > len(rounds) / 2:
-        profile += "commits to character choices"
-    elif mentions_emotion > 0:
-        profile += "brings emotional color to scenes"
-    else:
-        profile += "likes surprising beats and twists"
-
-    profile += ". Keep leaning into clear choices and stronger stakes."
-
-    summary_lines.append(profile)
-    summary_lines.append("Thanks for performing on Improv Battle — hope to see you again!")
-
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "summarize_show"})
-    return "\n".join(summary_lines)
+    return _summary_text(ctx.userdata)
 
 
 @function_tool
@@ -268,17 +347,15 @@ async def stop_show(ctx: RunContext[Userdata], confirm: Annotated[bool, Field(de
     userdata = ctx.userdata
     if not confirm:
         return "Are you sure you want to stop the show? Say 'stop show yes' to confirm."
-    userdata.improv_state["phase"] = "done"
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "stop_show"})
+    userdata.improv_state.phase = "done"
+    _log_event(userdata, "stop_show")
     return "Show stopped. Thanks for coming to Improv Battle!"
 
 
 # -------------------------
 # The Agent (Improv Host)
 # -------------------------
-class GameMasterAgent(Agent):
-    def __init__(self):
-        instructions = """
+_GM_INSTRUCTIONS: Final[str] = dedent("""
         You are the host of a TV improv show called 'Improv Battle'.
         Role: High-energy, witty, and clear about rules. Guide a single contestant through a series of short improv scenes.
 
@@ -290,39 +367,99 @@ class GameMasterAgent(Agent):
             - Run the configured number of rounds, then summarize the player's style.
             - Keep turns short and TTS-friendly.
         Use the provided tools: start_show, next_scenario, record_performance, summarize_show, stop_show.
-        """
+        """).strip()
+
+_TOOLS: Final = (start_show, next_scenario, record_performance, summarize_show, stop_show)
+
+
+class GameMasterAgent(Agent):
+    def __init__(self):
         super().__init__(
-            instructions=instructions,
-            tools=[start_show, next_scenario, record_performance, summarize_show, stop_show],
+            instructions=_GM_INSTRUCTIONS,
+            tools=list(_TOOLS),
         )
 
 # -------------------------
 # Entrypoint & Prewarm
 # -------------------------
+def _make_stt() -> assemblyai.STT:
+    # AssemblyAI streaming emits end-of-turn itself, so STT final and the
+    # turn decision arrive together instead of as two serial stages.
+    # Silence limits follow the "balanced" profile, with a longer max so
+    # dramatic pauses inside a performance don't end the turn.
+    return assemblyai.STT(
+        end_of_turn_confidence_threshold=0.4,
+        min_end_of_turn_silence_when_confident=400,
+        max_turn_silence=2400,
+    )
+
+
+def _make_llm() -> google.LLM:
+    return google.LLM(model="gemini-2.5-flash")
+
+
+def _make_tts() -> murf.TTS:
+    return murf.TTS(
+        voice="en-US-marcus",
+        style="Conversational",
+        text_pacing=True,
+    )
+
+
+async def _warm_tts_cache(tts: murf.TTS, tts_cache: dict[str, list[rtc.AudioFrame]]) -> None:
+    # Synthesize the fixed host lines in the background so later turns replay
+    # audio instead of paying TTS time-to-first-byte. Each job process serves
+    # a single room, so this costs one Murf synthesis per line per session.
+    for line in _ACK_LINES:
+        try:
+            async with tts.synthesize(line) as stream:
+                tts_cache[line] = [ev.frame async for ev in stream]
+        except Exception:
+            logger.warning(f"TTS cache warmup failed for {line!r}; it will be synthesized live.")
+
+
+async def _replay_frames(frames: list[rtc.AudioFrame]) -> AsyncIterator[rtc.AudioFrame]:
+    for frame in frames:
+        yield frame
+
+
 def prewarm(proc: JobProcess):
+    _scenarios()  # parse show content before the first job arrives
+
     try:
         proc.userdata["vad"] = silero.VAD.load()
     except Exception:
         logger.warning("VAD prewarm failed; continuing without preloaded VAD.")
 
+    # Build the plugin clients before the job is assigned so their construction
+    # is off the session's critical path. Each recognition/synthesis still
+    # opens its own stream, so the instances are safe to hand to the session.
+    for key, make in (("stt", _make_stt), ("llm", _make_llm), ("tts", _make_tts)):
+        try:
+            proc.userdata[key] = make()
+        except Exception:
+            logger.warning(f"{key.upper()} prewarm failed; it will be created per session.")
+
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
     logger.info("\n" + "🎭" * 6)
     logger.info("🚀 STARTING VOICE IMPROV HOST — Improv Battle")
 
+    tts = ctx.proc.userdata.get("tts") or _make_tts()
     userdata = Userdata()
+    logger.info(f"Session {userdata.session_id} started at {_iso_utc(userdata.started_at)}")
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice="en-US-marcus",
-            style="Conversational",
-            text_pacing=True,
-        ),
-        turn_detection=MultilingualModel(),
+        stt=ctx.proc.userdata.get("stt") or _make_stt(),
+        llm=ctx.proc.userdata.get("llm") or _make_llm(),
+        tts=tts,
+        turn_detection="stt",
+        # the STT already waited out the silence; don't stack another delay on top
+        min_endpointing_delay=0.0,
         vad=ctx.proc.userdata.get("vad"),
+        # start the LLM on the preliminary transcript while end-of-turn is decided
+        preemptive_generation=True,
         userdata=userdata,
     )
 
@@ -333,8 +470,17 @@ async def entrypoint(ctx: JobContext):
         room_input_options=RoomInputOptions(noise_cancellation=noise_cancellation.BVC()),
     )
 
+    # Warm the acknowledgment audio only once the session is up, so it doesn't
+    # compete with startup; cancel it if the job ends first.
+    warmup = asyncio.create_task(_warm_tts_cache(tts, userdata.tts_cache))
+
+    async def _cancel_warmup() -> None:
+        warmup.cancel()
+
+    ctx.add_shutdown_callback(_cancel_warmup)
+
     await ctx.connect()
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))